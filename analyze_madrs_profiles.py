@@ -12,8 +12,9 @@ import argparse
 import os
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # plots are only ever written to file
 import matplotlib.pyplot as plt
-import seaborn as sns
 from matplotlib.gridspec import GridSpec
 
 # Set by main() from CLI args
@@ -26,6 +27,17 @@ ITEM_COLS = [
     "SUICIDAL_THOUGHTS",
 ]
 
+# Explicit column types for read_csv: item scores fit in int8, totals in int16
+CSV_DTYPES = {
+    **{col: "int8" for col in ITEM_COLS},
+    "profile_id": "int32",
+    "target_score": "int16",
+    "actual_total_score": "int16",
+}
+
+# Upper triangle (above the diagonal) hidden on the correlation heatmaps
+UPPER_MASK = np.triu(np.ones((len(ITEM_COLS), len(ITEM_COLS)), dtype=bool), k=1)
+
 # Short labels for readability on plots
 SHORT_LABELS = {
     "REPORTED_SADNESS": "Reported\nSadness",
@@ -44,36 +56,68 @@ SHORT_LABELS = {
 #   Low:    0-19   (normal / mild)
 #   Medium: 20-34  (moderate)
 #   High:   35-60  (severe / very severe)
-BAND_BINS = [-1, 19, 34, 60]
+# Lower bound of each band above Low; band code = np.digitize(total, BAND_EDGES)
+BAND_EDGES = [20, 35]
 BAND_LABELS = ["Low (0-19)", "Medium (20-34)", "High (35-60)"]
 BAND_COLORS = {"Low (0-19)": "#4CAF50", "Medium (20-34)": "#FFC107", "High (35-60)": "#F44336"}
 
 
 def load_data(csv_path):
-    df = pd.read_csv(csv_path)
-    df["severity_band"] = pd.cut(
-        df["actual_total_score"],
-        bins=BAND_BINS,
-        labels=BAND_LABELS,
-    )
+    df = pd.read_csv(csv_path, engine="pyarrow", dtype=CSV_DTYPES)
+    # Integer band code (0=Low, 1=Medium, 2=High) from one digitize pass; the
+    # labelled categorical is built from the same codes for display/grouping
+    df["band_code"] = np.digitize(df["actual_total_score"].to_numpy(), BAND_EDGES).astype(np.int8)
+    df["severity_band"] = pd.Categorical.from_codes(df["band_code"], BAND_LABELS)
     print(f"Loaded {len(df)} profiles")
     print(f"\nSeverity band counts:\n{df['severity_band'].value_counts().sort_index()}")
     return df
 
 
+def pearson_corr(X):
+    """Pearson correlation between the columns of X from one cross-product.
+
+    Columns are standardized once and the matrix is (Xs.T @ Xs) / (n - 1).
+    Constant columns and groups with fewer than 2 rows give NaN, matching
+    DataFrame.corr().
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, k = X.shape
+    if n < 2:
+        return np.full((k, k), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        Xc = X - X.mean(axis=0)
+        Xs = Xc / Xc.std(axis=0, ddof=1)
+        return (Xs.T @ Xs) / (n - 1)
+
+
+def draw_corr_heatmap(ax, corr, mask=UPPER_MASK):
+    """Draw a lower-triangle correlation heatmap on ax.
+
+    One rasterized imshow for the cells plus a text annotation per visible
+    cell, instead of seaborn's per-cell patches. Returns the image so the
+    caller can attach a colorbar.
+    """
+    labels = [SHORT_LABELS[c] for c in ITEM_COLS]
+    im = ax.imshow(np.where(mask, np.nan, corr), cmap="RdBu_r", vmin=-1, vmax=1,
+                   rasterized=True)
+    for (i, j), v in np.ndenumerate(corr):
+        if not mask[i, j] and not np.isnan(v):
+            ax.text(j, i, f"{v:.2f}", ha="center", va="center", fontsize=9,
+                    color="white" if abs(v) > 0.6 else "black")
+    ax.set_xticks(range(len(labels)), labels, rotation=90)
+    ax.set_yticks(range(len(labels)), labels)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    return im
+
+
 # ── 1. Correlation Heatmap ──────────────────────────────────────────────────
 def plot_correlation_heatmap(df):
-    corr = df[ITEM_COLS].corr()
+    corr = pearson_corr(df[ITEM_COLS].to_numpy())
 
     fig, ax = plt.subplots(figsize=(10, 8))
-    mask = np.triu(np.ones_like(corr, dtype=bool), k=1)
-    sns.heatmap(
-        corr, mask=mask, annot=True, fmt=".2f", cmap="RdBu_r",
-        vmin=-1, vmax=1, center=0, square=True, linewidths=0.5,
-        xticklabels=[SHORT_LABELS[c] for c in ITEM_COLS],
-        yticklabels=[SHORT_LABELS[c] for c in ITEM_COLS],
-        ax=ax,
-    )
+    im = draw_corr_heatmap(ax, corr)
+    fig.colorbar(im, ax=ax)
     ax.set_title("MADRS Item Correlation Matrix (n={})".format(len(df)), fontsize=14, pad=12)
     fig.tight_layout()
     path = os.path.join(OUTPUT_DIR, "madrs_correlation_heatmap.png")
@@ -86,17 +130,13 @@ def plot_correlation_heatmap(df):
 def plot_correlation_by_band(df):
     fig, axes = plt.subplots(1, 3, figsize=(24, 7))
 
-    for ax, band in zip(axes, BAND_LABELS):
-        sub = df[df["severity_band"] == band]
-        corr = sub[ITEM_COLS].corr()
-        mask = np.triu(np.ones_like(corr, dtype=bool), k=1)
-        sns.heatmap(
-            corr, mask=mask, annot=True, fmt=".2f", cmap="RdBu_r",
-            vmin=-1, vmax=1, center=0, square=True, linewidths=0.5,
-            xticklabels=[SHORT_LABELS[c] for c in ITEM_COLS],
-            yticklabels=[SHORT_LABELS[c] for c in ITEM_COLS],
-            ax=ax,
-        )
+    # One partitioning pass; observed=False keeps empty bands so every
+    # panel is still drawn (in BAND_LABELS order)
+    grouped = df.groupby("severity_band", observed=False)[ITEM_COLS]
+    for ax, (band, sub) in zip(axes, grouped):
+        corr = pearson_corr(sub.to_numpy())
+        im = draw_corr_heatmap(ax, corr)
+        fig.colorbar(im, ax=ax)
         ax.set_title(f"{band}  (n={len(sub)})", fontsize=12)
 
     fig.suptitle("MADRS Item Correlations by Severity Band", fontsize=14, y=1.02)
@@ -110,20 +150,51 @@ def plot_correlation_by_band(df):
 # ── 3. Swarm plots by severity band ────────────────────────────────────────
 
 
-# ── 4. Histograms by severity band ─────────────────────────────────────────
-def plot_histograms_by_band(df):
+def _grid25():
+    """Create the 2x5 per-item panel grid used by the item histogram plots.
+
+    Returns (fig, flat axes). Pass it to the histogram plotters via
+    ``grid=`` to redraw into one figure instead of building a new one.
+    """
     fig, axes = plt.subplots(2, 5, figsize=(22, 9), sharey=False)
-    axes = axes.flatten()
+    return fig, axes.flatten()
+
+
+def _reuse_grid(grid):
+    """Return (fig, axes) from grid, cleared for redrawing, or a new grid."""
+    if grid is None:
+        return _grid25()
+    fig, axes = grid
+    for ax in axes:
+        ax.clear()
+    return fig, axes
+
 
-    bins = np.arange(-0.5, 7.5, 1)  # bin edges for integer scores 0-6
+# ── 4. Histograms by severity band ─────────────────────────────────────────
+def plot_histograms_by_band(df, grid=None):
+    fig, axes = _reuse_grid(grid)
+
+    scores = np.arange(7)  # integer scores 0-6
+    n_bands = len(BAND_LABELS)
+    width = 0.8 / n_bands
+
+    # counts[item, band, score], one bincount pass per item column
+    codes = df["band_code"].to_numpy()
+    values = df[ITEM_COLS].to_numpy()
+    counts = np.empty((len(ITEM_COLS), n_bands, 7), dtype=np.int64)
+    for idx in range(len(ITEM_COLS)):
+        counts[idx] = np.bincount(
+            codes * 7 + values[:, idx], minlength=n_bands * 7
+        ).reshape(n_bands, 7)
 
     for idx, col in enumerate(ITEM_COLS):
         ax = axes[idx]
-        for band in BAND_LABELS:
-            sub = df[df["severity_band"] == band][col]
-            ax.hist(
-                sub, bins=bins, alpha=0.55, label=band,
-                color=BAND_COLORS[band], edgecolor="white", linewidth=0.5,
+        # Side-by-side bars per score, one group of bars per band
+        for b, band in enumerate(BAND_LABELS):
+            ax.bar(
+                scores + (b - (n_bands - 1) / 2) * width, counts[idx, b],
+                width=width, label=band, color=BAND_COLORS[band],
+                edgecolor="white", linewidth=0.5,
             )
         ax.set_title(SHORT_LABELS[col].replace("\n", " "), fontsize=11)
         ax.set_xlabel("Score")
@@ -136,21 +207,24 @@ def plot_histograms_by_band(df):
     fig.tight_layout()
     path = os.path.join(OUTPUT_DIR, "madrs_histograms_by_band.png")
     fig.savefig(path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
+    if grid is None:
+        plt.close(fig)
     print(f"Saved: {path}")
 
 
 # ── 5. Overall histograms per item (all scores, no band split) ──────────────
-def plot_item_histograms_overall(df):
-    fig, axes = plt.subplots(2, 5, figsize=(22, 9), sharey=False)
-    axes = axes.flatten()
+def plot_item_histograms_overall(df, grid=None):
+    fig, axes = _reuse_grid(grid)
 
-    bins = np.arange(-0.5, 7.5, 1)
+    scores = np.arange(7)  # integer scores 0-6
+    values = df[ITEM_COLS].to_numpy(dtype=np.int64)
 
     for idx, col in enumerate(ITEM_COLS):
         ax = axes[idx]
-        ax.hist(
-            df[col], bins=bins, color="#5C6BC0", edgecolor="white", linewidth=0.5,
+        # Single linear counting pass instead of hist's float binning
+        counts = np.bincount(values[:, idx], minlength=7)
+        ax.bar(
+            scores, counts, width=1.0, color="#5C6BC0", edgecolor="white", linewidth=0.5,
         )
         ax.set_title(SHORT_LABELS[col].replace("\n", " "), fontsize=11)
         ax.set_xlabel("Score")
@@ -162,7 +236,8 @@ def plot_item_histograms_overall(df):
     fig.tight_layout()
     path = os.path.join(OUTPUT_DIR, "madrs_item_histograms_overall.png")
     fig.savefig(path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
+    if grid is None:
+        plt.close(fig)
     print(f"Saved: {path}")
 
 
@@ -171,8 +246,7 @@ def plot_sample_profiles(df, n_samples=50):
     short_x = [SHORT_LABELS[c].replace("\n", " ") for c in ITEM_COLS]
     fig, axes = plt.subplots(3, 1, figsize=(14, 18), sharey=True, sharex=True)
 
-    for ax, band in zip(axes, BAND_LABELS):
-        sub = df[df["severity_band"] == band]
+    for ax, (band, sub) in zip(axes, df.groupby("severity_band", observed=False)):
         sampled = sub.sample(n=min(n_samples, len(sub)), random_state=42)
 
         for _, row in sampled.iterrows():
@@ -206,8 +280,8 @@ def plot_sample_profiles(df, n_samples=50):
 def plot_total_score_distribution(df):
     fig, ax = plt.subplots(figsize=(10, 4))
     ax.hist(df["actual_total_score"], bins=30, edgecolor="white", color="#5C6BC0")
-    for edge in [19, 34]:
-        ax.axvline(edge + 0.5, color="red", linestyle="--", alpha=0.7)
+    for edge in BAND_EDGES:
+        ax.axvline(edge - 0.5, color="red", linestyle="--", alpha=0.7)
     ax.set_xlabel("Total MADRS Score")
     ax.set_ylabel("Count")
     ax.set_title("Distribution of Total MADRS Scores (n={})".format(len(df)))
@@ -245,8 +319,11 @@ def main():
 
     plot_correlation_heatmap(df)
     plot_correlation_by_band(df)
-    plot_histograms_by_band(df)
-    plot_item_histograms_overall(df)
+    # Both item histogram plots draw into one shared 2x5 figure
+    grid = _grid25()
+    plot_histograms_by_band(df, grid=grid)
+    plot_item_histograms_overall(df, grid=grid)
+    plt.close(grid[0])
     plot_sample_profiles(df)
     plot_total_score_distribution(df)
 
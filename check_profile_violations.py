@@ -10,164 +10,193 @@ Usage:
 """
 
 import argparse
-import csv
 import os
+
+import numpy as np
 import pandas as pd
 
 
 # ── Generating rules (from _generate_madrs_profile_for_total_score) ─────────
 # These are the constrained ranges used when the rule-based generator builds
 # profiles. Other generators may not follow them.
+#
+# Every rule is evaluated as one boolean mask over all profiles at once.
+# Detail strings are only formatted for the (usually few) offending rows.
+
+def _item_columns(df: pd.DataFrame) -> tuple[np.ndarray, dict]:
+    """Return the (N, 10) item score array and a column-name -> view mapping."""
+    arr = df[ITEM_COLS].to_numpy(dtype=np.int8)
+    return arr, dict(zip(ITEM_COLS, arr.T))
 
-def check_generating_rules(row: dict) -> list[dict]:
-    """Check a single profile against the rule-based generator's constraints.
 
-    Returns a list of violation dicts.
+def _collect(violations, rule_type, rule, mask, template, *columns):
+    """Append a violation record for every row where ``mask`` is True.
+
+    ``template`` is a str.format pattern filled, per offending row, with that
+    row's values from ``columns``. The values are pulled out with one
+    fancy-index + tolist() per column, so formatting works on plain Python
+    ints rather than indexing NumPy scalars one at a time.
+    """
+    rows = np.flatnonzero(mask)
+    if rows.size:
+        values = zip(*(col[rows].tolist() for col in columns))
+        violations.append({
+            "rule_type": rule_type,
+            "rule": rule,
+            "rows": rows,
+            "details": [template.format(*v) for v in values],
+        })
+
+
+def check_generating_rules(df: pd.DataFrame) -> list[dict]:
+    """Check all profiles against the rule-based generator's constraints.
+
+    Returns one dict per violated rule with the offending row positions
+    (``rows``) and a detail string for each of them (``details``).
     """
     violations = []
-    s = {k: int(row[k]) for k in ITEM_COLS}
+    arr, s = _item_columns(df)
+    rs = s["REPORTED_SADNESS"]
+    ap = s["APPARENT_SADNESS"]
+    sui = s["SUICIDAL_THOUGHTS"]
+    pess = s["PESSIMISTIC_THOUGHTS"]
+    feel = s["INABILITY_TO_FEEL"]
 
     # 1. Apparent sadness should be within ±1 of reported sadness
-    diff = abs(s["APPARENT_SADNESS"] - s["REPORTED_SADNESS"])
-    if diff > 1:
-        violations.append({
-            "rule_type": "generating",
-            "rule": "apparent_sadness_within_1_of_reported",
-            "detail": f"APPARENT_SADNESS={s['APPARENT_SADNESS']} vs "
-                      f"REPORTED_SADNESS={s['REPORTED_SADNESS']} (diff={diff})",
-        })
+    diff = np.abs(ap - rs)
+    _collect(
+        violations, "generating", "apparent_sadness_within_1_of_reported", diff > 1,
+        "APPARENT_SADNESS={} vs REPORTED_SADNESS={} (diff={})",
+        ap, rs, diff,
+    )
 
     # 2. Suicidal thoughts bounded by sadness level
-    if s["REPORTED_SADNESS"] <= 1:
-        max_suicide = 1
-    elif s["REPORTED_SADNESS"] <= 3:
-        max_suicide = min(3, s["REPORTED_SADNESS"] + 1)
-    else:
-        max_suicide = 6
-
-    if s["REPORTED_SADNESS"] == 0:
-        # When sadness=0, generator doesn't set suicidal thoughts at all (stays 0)
-        if s["SUICIDAL_THOUGHTS"] > 0:
-            violations.append({
-                "rule_type": "generating",
-                "rule": "suicidal_zero_when_no_sadness",
-                "detail": f"SUICIDAL_THOUGHTS={s['SUICIDAL_THOUGHTS']} "
-                          f"but REPORTED_SADNESS=0",
-            })
-    elif s["SUICIDAL_THOUGHTS"] > max_suicide:
-        violations.append({
-            "rule_type": "generating",
-            "rule": "suicidal_thoughts_bounded_by_sadness",
-            "detail": f"SUICIDAL_THOUGHTS={s['SUICIDAL_THOUGHTS']} > "
-                      f"max_allowed={max_suicide} (REPORTED_SADNESS={s['REPORTED_SADNESS']})",
-        })
+    max_suicide = np.where(rs <= 1, 1, np.where(rs <= 3, np.minimum(3, rs + 1), 6))
+
+    # When sadness=0, generator doesn't set suicidal thoughts at all (stays 0)
+    _collect(
+        violations, "generating", "suicidal_zero_when_no_sadness", (rs == 0) & (sui > 0),
+        "SUICIDAL_THOUGHTS={} but REPORTED_SADNESS=0",
+        sui,
+    )
+    _collect(
+        violations, "generating", "suicidal_thoughts_bounded_by_sadness",
+        (rs != 0) & (sui > max_suicide),
+        "SUICIDAL_THOUGHTS={} > max_allowed={} (REPORTED_SADNESS={})",
+        sui, max_suicide, rs,
+    )
 
     # 3. Pessimistic thoughts bounded: [0, min(6, sadness + 2)]
-    if s["REPORTED_SADNESS"] == 0:
-        if s["PESSIMISTIC_THOUGHTS"] > 0:
-            violations.append({
-                "rule_type": "generating",
-                "rule": "pessimism_zero_when_no_sadness",
-                "detail": f"PESSIMISTIC_THOUGHTS={s['PESSIMISTIC_THOUGHTS']} "
-                          f"but REPORTED_SADNESS=0",
-            })
-    else:
-        max_pessimism = min(6, s["REPORTED_SADNESS"] + 2)
-        if s["PESSIMISTIC_THOUGHTS"] > max_pessimism:
-            violations.append({
-                "rule_type": "generating",
-                "rule": "pessimistic_thoughts_bounded_by_sadness",
-                "detail": f"PESSIMISTIC_THOUGHTS={s['PESSIMISTIC_THOUGHTS']} > "
-                          f"max_allowed={max_pessimism} (REPORTED_SADNESS={s['REPORTED_SADNESS']})",
-            })
+    max_pessimism = np.minimum(6, rs + 2)
+    _collect(
+        violations, "generating", "pessimism_zero_when_no_sadness", (rs == 0) & (pess > 0),
+        "PESSIMISTIC_THOUGHTS={} but REPORTED_SADNESS=0",
+        pess,
+    )
+    _collect(
+        violations, "generating", "pessimistic_thoughts_bounded_by_sadness",
+        (rs != 0) & (pess > max_pessimism),
+        "PESSIMISTIC_THOUGHTS={} > max_allowed={} (REPORTED_SADNESS={})",
+        pess, max_pessimism, rs,
+    )
 
     # 4. Anhedonia floor: inability_to_feel >= reported_sadness // 2
-    if s["REPORTED_SADNESS"] > 0:
-        min_anhedonia = s["REPORTED_SADNESS"] // 2
-        if s["INABILITY_TO_FEEL"] < min_anhedonia:
-            violations.append({
-                "rule_type": "generating",
-                "rule": "anhedonia_floor_by_sadness",
-                "detail": f"INABILITY_TO_FEEL={s['INABILITY_TO_FEEL']} < "
-                          f"min_allowed={min_anhedonia} (REPORTED_SADNESS={s['REPORTED_SADNESS']})",
-            })
+    min_anhedonia = rs // 2
+    _collect(
+        violations, "generating", "anhedonia_floor_by_sadness",
+        (rs > 0) & (feel < min_anhedonia),
+        "INABILITY_TO_FEEL={} < min_allowed={} (REPORTED_SADNESS={})",
+        feel, min_anhedonia, rs,
+    )
 
     # 5. All items in valid range [0, 6]
-    for item in ITEM_COLS:
-        if s[item] < 0 or s[item] > 6:
-            violations.append({
-                "rule_type": "generating",
-                "rule": "item_range_0_to_6",
-                "detail": f"{item}={s[item]} out of range [0, 6]",
-            })
-
-    # 6. Total score matches target
-    actual = sum(s.values())
-    target = int(row["target_score"])
-    if actual != target:
+    # np.nonzero walks the 2D mask row-major, so offending items stay in
+    # ITEM_COLS order within each profile.
+    bad_rows, bad_cols = np.nonzero((arr < 0) | (arr > 6))
+    if bad_rows.size:
         violations.append({
             "rule_type": "generating",
-            "rule": "total_matches_target",
-            "detail": f"actual_total={actual} != target_score={target}",
+            "rule": "item_range_0_to_6",
+            "rows": bad_rows,
+            "details": [f"{ITEM_COLS[c]}={v} out of range [0, 6]"
+                        for c, v in zip(bad_cols.tolist(),
+                                        arr[bad_rows, bad_cols].tolist())],
         })
 
+    # 6. Total score matches target
+    actual = arr.sum(axis=1, dtype=np.int64)
+    target = df["target_score"].to_numpy(dtype=np.int64)
+    _collect(
+        violations, "generating", "total_matches_target", actual != target,
+        "actual_total={} != target_score={}",
+        actual, target,
+    )
+
     return violations
 
 
 # ── Clinical plausibility rules (from _apply_madrs_rules) ──────────────────
 
-def check_clinical_rules(row: dict) -> list[dict]:
-    """Check a single profile against MADRS clinical plausibility rules.
+def check_clinical_rules(df: pd.DataFrame) -> list[dict]:
+    """Check all profiles against MADRS clinical plausibility rules.
 
     These are the rules in ProfileGenerator._apply_madrs_rules that
-    *correct* implausible profiles after generation.
+    *correct* implausible profiles after generation. Returns records in
+    the same shape as check_generating_rules.
     """
     violations = []
-    s = {k: int(row[k]) for k in ITEM_COLS}
+    _, s = _item_columns(df)
+    rs = s["REPORTED_SADNESS"]
+    sui = s["SUICIDAL_THOUGHTS"]
+    pess = s["PESSIMISTIC_THOUGHTS"]
+    feel = s["INABILITY_TO_FEEL"]
+    tension = s["INNER_TENSION"]
+    sleep = s["REDUCED_SLEEP"]
 
     # Rule 1: Core Mood Gate
     # If REPORTED_SADNESS <= 1, SUICIDAL_THOUGHTS should be <= 2
-    if s["REPORTED_SADNESS"] <= 1 and s["SUICIDAL_THOUGHTS"] > 2:
-        violations.append({
-            "rule_type": "clinical",
-            "rule": "mood_gate_suicidal",
-            "detail": f"REPORTED_SADNESS={s['REPORTED_SADNESS']} <= 1 but "
-                      f"SUICIDAL_THOUGHTS={s['SUICIDAL_THOUGHTS']} > 2",
-        })
+    _collect(
+        violations, "clinical", "mood_gate_suicidal", (rs <= 1) & (sui > 2),
+        "REPORTED_SADNESS={} <= 1 but SUICIDAL_THOUGHTS={} > 2",
+        rs, sui,
+    )
 
     # Rule 2: Core Mood Gate
     # If REPORTED_SADNESS <= 1, PESSIMISTIC_THOUGHTS should be <= 2
-    if s["REPORTED_SADNESS"] <= 1 and s["PESSIMISTIC_THOUGHTS"] > 2:
-        violations.append({
-            "rule_type": "clinical",
-            "rule": "mood_gate_pessimism",
-            "detail": f"REPORTED_SADNESS={s['REPORTED_SADNESS']} <= 1 but "
-                      f"PESSIMISTIC_THOUGHTS={s['PESSIMISTIC_THOUGHTS']} > 2",
-        })
+    _collect(
+        violations, "clinical", "mood_gate_pessimism", (rs <= 1) & (pess > 2),
+        "REPORTED_SADNESS={} <= 1 but PESSIMISTIC_THOUGHTS={} > 2",
+        rs, pess,
+    )
 
     # Rule 3: Anhedonia Link
     # If INABILITY_TO_FEEL >= 4, REPORTED_SADNESS should be >= 2
-    if s["INABILITY_TO_FEEL"] >= 4 and s["REPORTED_SADNESS"] < 2:
-        violations.append({
-            "rule_type": "clinical",
-            "rule": "anhedonia_requires_sadness",
-            "detail": f"INABILITY_TO_FEEL={s['INABILITY_TO_FEEL']} >= 4 but "
-                      f"REPORTED_SADNESS={s['REPORTED_SADNESS']} < 2",
-        })
+    _collect(
+        violations, "clinical", "anhedonia_requires_sadness", (feel >= 4) & (rs < 2),
+        "INABILITY_TO_FEEL={} >= 4 but REPORTED_SADNESS={} < 2",
+        feel, rs,
+    )
 
     # Rule 4: Tension and Sleep Link
     # If INNER_TENSION >= 4, REDUCED_SLEEP should be > 0
-    if s["INNER_TENSION"] >= 4 and s["REDUCED_SLEEP"] == 0:
-        violations.append({
-            "rule_type": "clinical",
-            "rule": "tension_requires_sleep_disturbance",
-            "detail": f"INNER_TENSION={s['INNER_TENSION']} >= 4 but "
-                      f"REDUCED_SLEEP=0",
-        })
+    _collect(
+        violations, "clinical", "tension_requires_sleep_disturbance",
+        (tension >= 4) & (sleep == 0),
+        "INNER_TENSION={} >= 4 but REDUCED_SLEEP=0",
+        tension,
+    )
 
     return violations
 
 
+def _profiles_hit(violations: list[dict], n: int) -> int:
+    """Number of distinct profiles with at least one of the given violations."""
+    hit = np.zeros(n, dtype=bool)
+    for v in violations:
+        hit[v["rows"]] = True
+    return int(hit.sum())
+
+
 # ── Item columns ────────────────────────────────────────────────────────────
 
 ITEM_COLS = [
@@ -177,6 +206,14 @@ ITEM_COLS = [
     "SUICIDAL_THOUGHTS",
 ]
 
+# Explicit column types for read_csv: item scores fit in int8, totals in int16
+CSV_DTYPES = {
+    **{col: "int8" for col in ITEM_COLS},
+    "profile_id": "int32",
+    "target_score": "int16",
+    "actual_total_score": "int16",
+}
+
 
 # ── Main ────────────────────────────────────────────────────────────────────
 
@@ -198,31 +235,17 @@ def main():
     output_dir = args.output_dir or os.path.dirname(csv_path)
     os.makedirs(output_dir, exist_ok=True)
 
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, engine="pyarrow", dtype=CSV_DTYPES)
     print(f"Loaded {len(df)} profiles from {csv_path}\n")
 
-    all_violations = []
-    profiles_with_gen_violations = 0
-    profiles_with_clin_violations = 0
-
-    for _, row in df.iterrows():
-        pid = int(row["profile_id"])
-        gen_v = check_generating_rules(row)
-        clin_v = check_clinical_rules(row)
+    gen_violations = check_generating_rules(df)
+    clin_violations = check_clinical_rules(df)
 
-        if gen_v:
-            profiles_with_gen_violations += 1
-        if clin_v:
-            profiles_with_clin_violations += 1
-
-        for v in gen_v + clin_v:
-            v["profile_id"] = pid
-            v["target_score"] = int(row["target_score"])
-            v["actual_total_score"] = int(row["actual_total_score"])
-            all_violations.append(v)
+    n = len(df)
+    profiles_with_gen_violations = _profiles_hit(gen_violations, n)
+    profiles_with_clin_violations = _profiles_hit(clin_violations, n)
 
     # ── Summary ─────────────────────────────────────────────────────────────
-    n = len(df)
     print("=" * 70)
     print(f"  VIOLATION SUMMARY  ({os.path.basename(csv_path)})")
     print("=" * 70)
@@ -233,37 +256,50 @@ def main():
     print(f"  Profiles with clinical violations:   {profiles_with_clin_violations} "
           f"({100 * profiles_with_clin_violations / n:.1f}%)")
 
-    # Count by rule
-    gen_violations = [v for v in all_violations if v["rule_type"] == "generating"]
-    clin_violations = [v for v in all_violations if v["rule_type"] == "clinical"]
-
-    print(f"\n  Total generating rule violations:    {len(gen_violations)}")
-    if gen_violations:
-        gen_by_rule = {}
-        for v in gen_violations:
-            gen_by_rule[v["rule"]] = gen_by_rule.get(v["rule"], 0) + 1
-        for rule, count in sorted(gen_by_rule.items(), key=lambda x: -x[1]):
-            print(f"    {rule:<45} {count:>5}")
-
-    print(f"\n  Total clinical rule violations:      {len(clin_violations)}")
-    if clin_violations:
-        clin_by_rule = {}
-        for v in clin_violations:
-            clin_by_rule[v["rule"]] = clin_by_rule.get(v["rule"], 0) + 1
-        for rule, count in sorted(clin_by_rule.items(), key=lambda x: -x[1]):
-            print(f"    {rule:<45} {count:>5}")
+    # Count by rule (rules listed in order of first occurrence, so ties in
+    # the count sort below keep a stable, row-ordered ranking)
+    gen_by_rule = {v["rule"]: len(v["rows"])
+                   for v in sorted(gen_violations, key=lambda v: v["rows"][0])}
+    clin_by_rule = {v["rule"]: len(v["rows"])
+                    for v in sorted(clin_violations, key=lambda v: v["rows"][0])}
+
+    print(f"\n  Total generating rule violations:    {sum(gen_by_rule.values())}")
+    for rule, count in sorted(gen_by_rule.items(), key=lambda x: -x[1]):
+        print(f"    {rule:<45} {count:>5}")
+
+    print(f"\n  Total clinical rule violations:      {sum(clin_by_rule.values())}")
+    for rule, count in sorted(clin_by_rule.items(), key=lambda x: -x[1]):
+        print(f"    {rule:<45} {count:>5}")
 
     print()
 
     # ── Save detailed violations CSV ────────────────────────────────────────
+    all_violations = gen_violations + clin_violations
     if all_violations:
+        # One small typed frame per rule, concatenated once, then ordered by
+        # profile and rule (stable sort keeps the rule order within a profile).
+        pids = df["profile_id"].to_numpy()
+        targets = df["target_score"].to_numpy()
+        actuals = df["actual_total_score"].to_numpy()
+        report = pd.concat(
+            [
+                pd.DataFrame({
+                    "row": v["rows"],
+                    "profile_id": pids[v["rows"]],
+                    "target_score": targets[v["rows"]],
+                    "actual_total_score": actuals[v["rows"]],
+                    "rule_type": v["rule_type"],
+                    "rule": v["rule"],
+                    "detail": v["details"],
+                })
+                for v in all_violations
+            ],
+            ignore_index=True,
+        )
+        report = report.sort_values("row", kind="stable").drop(columns="row")
+
         out_path = os.path.join(output_dir, "violations_report.csv")
-        fieldnames = ["profile_id", "target_score", "actual_total_score",
-                       "rule_type", "rule", "detail"]
-        with open(out_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_violations)
+        report.to_csv(out_path, index=False)
         print(f"  Detailed report saved to: {out_path}")
     else:
         print("  No violations found — no report file written.")
@@ -6,15 +6,17 @@ Usage:
     python generate_profiles.py
     python generate_profiles.py --n 500 --scale madrs
     python generate_profiles.py --n 500 --scale all
+    python generate_profiles.py --n 500 --scale madrs --no-json
 """
 
 import argparse
-import csv
-import json
 import os
 import random
 import sys
 
+import numpy as np
+import pandas as pd
+
 # Setup path so we can import from the vp folder
 VP_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vp")
 sys.path.insert(0, VP_ROOT)
@@ -24,26 +26,42 @@ from core.profile_generator import ProfileGenerator
 from core.scale_registry import SCALE_REGISTRY
 
 
+# Per-profile metadata columns, in output order. Item score columns follow.
+META_FIELDS = [
+    "profile_id", "scale", "persona_name", "persona_age", "persona_occupation",
+    "persona_life_situation", "communication_style", "target_score",
+    "actual_total_score",
+]
+
+
 def generate_profiles(n_profiles: int, scale_name: str, seed: int = 42):
     """Generate n patient profiles for a given scale.
 
-    Returns a list of flat dicts ready for CSV/DataFrame consumption.
+    Returns a DataFrame with one row per successfully generated profile.
+    Columns are accumulated as preallocated lists and assembled once at the
+    end instead of building a dict per profile.
     """
-    random.seed(seed)
+    random.seed(seed)  # keeps any global-random draws in ProfileGenerator seeded
     profile_gen = ProfileGenerator(scale_name)
     max_score = SCALE_REGISTRY.get_max_score(scale_name)
 
     personas = config.PERSONAS
     styles = list(config.COMMUNICATION_STYLE_DESCRIPTIONS.keys())
 
-    profiles = []
+    # Pre-draw persona, style and target score for every profile at once
+    rng = np.random.default_rng(seed)
+    persona_idx = rng.integers(0, len(personas), n_profiles)
+    style_idx = rng.integers(0, len(styles), n_profiles)
+    target_scores = np.clip(np.round(rng.normal(25, 11, n_profiles)), 5, 55).astype(int)
+
+    cols = {name: [None] * n_profiles for name in META_FIELDS}
+    n_ok = 0  # next free slot; failed profiles leave no gap
     failed = 0
 
     for i in range(n_profiles):
-        persona = random.choice(personas)
-        style = random.choice(styles)
-        target_score = int(round(random.gauss(25, 11)))
-        target_score = max(5, min(55, target_score))
+        persona = personas[persona_idx[i]]
+        style = styles[style_idx[i]]
+        target_score = int(target_scores[i])
 
         scores_dict = profile_gen.generate_profile_for_total_score(target_score)
 
@@ -51,48 +69,43 @@ def generate_profiles(n_profiles: int, scale_name: str, seed: int = 42):
             failed += 1
             continue
 
-        actual_total = sum(scores_dict.values())
-
-        row = {
-            "profile_id": i,
-            "scale": scale_name,
-            "persona_name": persona["Name"],
-            "persona_age": persona["Age"],
-            "persona_occupation": persona["Occupation"],
-            "persona_life_situation": persona["Life Situation"],
-            "communication_style": style,
-            "target_score": target_score,
-            "actual_total_score": actual_total,
-        }
+        j = n_ok
+        cols["profile_id"][j] = i
+        cols["scale"][j] = scale_name
+        cols["persona_name"][j] = persona["Name"]
+        cols["persona_age"][j] = persona["Age"]
+        cols["persona_occupation"][j] = persona["Occupation"]
+        cols["persona_life_situation"][j] = persona["Life Situation"]
+        cols["communication_style"][j] = style
+        cols["target_score"][j] = target_score
+        cols["actual_total_score"][j] = sum(scores_dict.values())
         # Add each item score as its own column
         for item_key, score_val in scores_dict.items():
-            row[item_key] = score_val
+            cols.setdefault(item_key, [None] * n_profiles)[j] = score_val
+        n_ok += 1
 
-        profiles.append(row)
+    df = pd.DataFrame({name: values[:n_ok] for name, values in cols.items()})
 
-    print(f"Generated {len(profiles)}/{n_profiles} profiles for {scale_name} "
+    print(f"Generated {len(df)}/{n_profiles} profiles for {scale_name} "
           f"({failed} failed)")
-    return profiles
+    return df
 
 
-def save_profiles(profiles, output_dir, scale_name):
-    """Save profiles as both CSV and JSON."""
+def save_profiles(df, output_dir, scale_name, write_json=True):
+    """Save profiles as CSV and, unless write_json is False, JSON."""
     os.makedirs(output_dir, exist_ok=True)
 
     # --- CSV ---
     csv_path = os.path.join(output_dir, f"profiles_{scale_name}.csv")
-    if profiles:
-        fieldnames = list(profiles[0].keys())
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(profiles)
+    if not df.empty:
+        df.to_csv(csv_path, index=False)
         print(f"Saved CSV: {csv_path}")
 
     # --- JSON (for programmatic use) ---
+    if not write_json:
+        return
     json_path = os.path.join(output_dir, f"profiles_{scale_name}.json")
-    with open(json_path, "w") as f:
-        json.dump(profiles, f, indent=2)
+    df.to_json(json_path, orient="records", indent=2)
     print(f"Saved JSON: {json_path}")
 
 
@@ -116,6 +129,10 @@ def main():
         "--output_dir", type=str, default=None,
         help="Output directory (default: ./generated_profiles/)"
     )
+    parser.add_argument(
+        "--no-json", action="store_true",
+        help="Only write CSV output, skip the per-scale JSON files"
+    )
     args = parser.parse_args()
 
     output_dir = args.output_dir or os.path.join(
@@ -135,29 +152,24 @@ def main():
 
     all_profiles = []
     for scale in scales_to_run:
-        profiles = generate_profiles(args.n, scale, seed=args.seed)
-        save_profiles(profiles, output_dir, scale)
-        all_profiles.extend(profiles)
+        df = generate_profiles(args.n, scale, seed=args.seed)
+        save_profiles(df, output_dir, scale, write_json=not args.no_json)
+        all_profiles.append(df)
+
+    n_total = sum(len(df) for df in all_profiles)
 
     # If multiple scales, also save a combined file
-    if len(scales_to_run) > 1 and all_profiles:
+    if len(scales_to_run) > 1 and n_total:
         combined_csv = os.path.join(output_dir, "profiles_all.csv")
-        # Union of all keys across scales (different scales have different items)
-        all_keys = []
-        seen = set()
-        for p in all_profiles:
-            for k in p.keys():
-                if k not in seen:
-                    all_keys.append(k)
-                    seen.add(k)
-
-        with open(combined_csv, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=all_keys, extrasaction="ignore")
-            writer.writeheader()
-            writer.writerows(all_profiles)
+        # concat takes the union of columns across scales (different scales
+        # have different items); nullable ints keep missing items blank.
+        combined = pd.concat(all_profiles, ignore_index=True)
+        item_cols = [c for c in combined.columns if c not in META_FIELDS]
+        combined = combined.astype({c: "Int64" for c in item_cols})
+        combined.to_csv(combined_csv, index=False)
         print(f"Saved combined CSV: {combined_csv}")
 
-    print(f"\nDone. Total profiles: {len(all_profiles)}")
+    print(f"\nDone. Total profiles: {n_total}")
 
 
 if __name__ == "__main__":
@@ -1,38 +1,61 @@
+import functools
+
 import pandas as pd
 import numpy as np
 
-def generate_from_matrix(csv_path, target_score):
-    # Load and prep matrix
+# MADRS per-item ceiling
+MAX_ITEM_SCORE = 6
+
+
+@functools.lru_cache(maxsize=4)
+def _load_matrix(csv_path):
+    """Parse the correlation matrix CSV once per path.
+
+    Returns (item_labels, chol) where chol is the lower Cholesky factor of
+    the correlation matrix, so samples are chol @ z with z ~ N(0, I).
+    """
     df = pd.read_csv(csv_path, index_col=0)
-    corr_matrix = df.values
-    n_items = len(df)
-    
+    return df.index.tolist(), np.linalg.cholesky(df.values.astype(np.float64))
+
+
+def distribute_points(target_score, probs, ceiling=MAX_ITEM_SCORE):
+    """Distribute target_score points over items with fixed probabilities.
+
+    All points are drawn in one multinomial call. Points that land on an
+    item already at the ceiling are redrawn among the items that still have
+    room, which is equivalent to assigning points one at a time while
+    skipping full items (no per-point renormalization).
+    """
+    scores = np.random.multinomial(target_score, probs)
+    while True:
+        overflow = np.maximum(scores - ceiling, 0).sum()
+        if overflow == 0:
+            break
+        scores = np.minimum(scores, ceiling)
+        open_probs = np.where(scores < ceiling, probs, 0.0)
+        if not open_probs.any(): break # All items at the ceiling
+        scores += np.random.multinomial(overflow, open_probs / open_probs.sum())
+    return scores
+
+
+def generate_from_matrix(csv_path, target_score):
+    # Load and prep matrix (cached across calls)
+    labels, chol = _load_matrix(csv_path)
+    n_items = len(labels)
+
     # Generate a raw sample using the correlation matrix
     # We use a mean of 0 and let the correlation dictate the variance structure
-    raw_sample = np.random.multivariate_normal(np.zeros(n_items), corr_matrix)
-    
+    # (equivalent to multivariate_normal(0, corr_matrix) via the cached factor)
+    raw_sample = chol @ np.random.standard_normal(n_items)
+
     # 1. Transform raw sample to probabilities using Softmax
     # A higher 'beta' makes the profile more 'stereotypical' to the correlations
     beta = 1.5
     exp_s = np.exp(raw_sample * beta)
     probs = exp_s / np.sum(exp_s)
-    
-    # 2. Distribute target_score points based on these probabilities
-    final_scores = np.zeros(n_items, dtype=int)
-    remaining_points = target_score
-    
-    # Iteratively assign points while respecting the 0-6 item limit
-    while remaining_points > 0:
-        # Only pick items that haven't hit the ceiling of 6
-        valid_mask = final_scores < 6
-        if not np.any(valid_mask): break # All items at 6
-        
-        # Re-normalize probabilities for valid items
-        current_probs = probs[valid_mask] / probs[valid_mask].sum()
-        valid_indices = np.where(valid_mask)[0]
-        
-        idx = np.random.choice(valid_indices, p=current_probs)
-        final_scores[idx] += 1
-        remaining_points -= 1
-        
-    return dict(zip(df.index, final_scores))
\ No newline at end of file
+
+    # 2. Distribute target_score points based on these probabilities,
+    # respecting the 0-6 item limit
+    final_scores = distribute_points(target_score, probs)
+
+    return dict(zip(labels, final_scores))
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy.stats import multivariate_normal
+
+from generate_profiles_borentain import distribute_points
 
 class FactorBasedMADRSGenerator:
     def __init__(self):
@@ -20,38 +21,46 @@ class FactorBasedMADRSGenerator:
             [0.38, 0.57, 0.62, 1.00]   # Neg Thought
         ])
 
+        # Cholesky factor of the factor correlations, so latent draws are a
+        # single matmul instead of a scipy multivariate_normal call each time
+        self.L = np.linalg.cholesky(self.factor_corr)
+
+        # 3. Dense (10 x 4) item-by-factor loading matrix; rows follow the
+        # order items appear in self.loadings
+        self.items = [item for items in self.loadings.values() for item in items]
+        self.loading_matrix = np.zeros((len(self.items), len(self.factor_names)))
+        for f_idx, factor in enumerate(self.factor_names):
+            for item, loading in self.loadings[factor].items():
+                self.loading_matrix[self.items.index(item), f_idx] = loading
+
     def generate(self, target_score: int):
         # Step A: Sample the Latent Patient Profile
         # This determines if they are 'mostly sad' or 'mostly neurovegetative'
-        latent_values = multivariate_normal.rvs(mean=[0,0,0,0], cov=self.factor_corr)
-        factor_map = dict(zip(self.factor_names, latent_values))
+        latent_values = self.L @ np.random.standard_normal(len(self.factor_names))
 
         # Step B: Calculate 'Propensity' for each item
-        propensities = {}
-        for factor, items in self.loadings.items():
-            for item, loading in items.items():
-                # Propensity = (Factor Score * Loading) + noise
-                # We use exp() to ensure propensities are positive for sampling
-                val = (factor_map[factor] * loading) 
-                propensities[item] = np.exp(val) 
+        # Propensity = (Factor Score * Loading)
+        # We use exp() to ensure propensities are positive for sampling
+        probs = np.exp(self.loading_matrix @ latent_values)
+        probs /= probs.sum()
 
         # Step C: Distribute points based on propensities
         # This ensures the sum is exactly target_score
-        items = list(propensities.keys())
-        probs = np.array(list(propensities.values()))
-        probs /= probs.sum()
+        scores = distribute_points(target_score, probs)
+        return {item: int(s) for item, s in zip(self.items, scores)}
 
-        scores = {item: 0 for item in items}
-        points_to_assign = target_score
-        
-        while points_to_assign > 0:
-            # Respect MADRS ceiling of 6
-            valid_indices = [i for i, item in enumerate(items) if scores[item] < 6]
-            if not valid_indices: break
-            
-            p_sub = probs[valid_indices] / probs[valid_indices].sum()
-            idx = np.random.choice(valid_indices, p=p_sub)
-            scores[items[idx]] += 1
-            points_to_assign -= 1
-            
-        return scores
\ No newline at end of file
+    def generate_batch(self, target_scores) -> np.ndarray:
+        """Generate one profile per entry of target_scores.
+
+        All latent profiles are drawn in one (4 x N) matmul. Returns an
+        (N, 10) integer array whose columns follow self.items.
+        """
+        target_scores = np.asarray(target_scores, dtype=np.int64)
+        latent = self.L @ np.random.standard_normal((len(self.factor_names), len(target_scores)))
+        probs = np.exp(self.loading_matrix @ latent)
+        probs /= probs.sum(axis=0)
+
+        scores = np.empty((len(target_scores), len(self.items)), dtype=np.int64)
+        for n, target_score in enumerate(target_scores):
+            scores[n] = distribute_points(target_score, probs[:, n])
+        return scores
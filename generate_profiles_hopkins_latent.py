@@ -1,7 +1,30 @@
 import numpy as np
 
+# Column positions of the MADRS items in HierarchicalMADRSGenerator.item_keys
+RS, APS, IT, RSLP, RAPP, CONC, LASS, FEEL, PESS, SUIC = range(10)
+
+def _equicorr_chol(rho: float, d: int = 4) -> np.ndarray:
+    """Closed-form lower Cholesky factor of the d x d equicorrelation matrix.
+
+    For rho * ones + (1 - rho) * I every row below column j shares the same
+    entry l_j, so with s_j = sum(l_k**2 for k < j):
+    L[j, j] = sqrt(1 - s_j) and L[i, j] = (rho - s_j) / L[j, j] for i > j.
+    """
+    L = np.zeros((d, d))
+    s = 0.0
+    for j in range(d):
+        L[j, j] = np.sqrt(1.0 - s)
+        l_j = (rho - s) / L[j, j]
+        L[j + 1:, j] = l_j
+        s += l_j * l_j
+    return L
+
 class HierarchicalMADRSGenerator:
-    def __init__(self):
+    def __init__(self, rng: np.random.Generator | None = None):
+        # All sampling goes through this Generator (PCG64 by default);
+        # pass a seeded one for reproducible output.
+        self.rng = rng or np.random.default_rng()
+
         self.item_keys = [
             "REPORTED_SADNESS", "APPARENT_SADNESS", "INNER_TENSION",
             "REDUCED_SLEEP", "REDUCED_APPETITE", "CONCENTRATION_DIFFICULTIES",
@@ -50,25 +73,39 @@ class HierarchicalMADRSGenerator:
             "CONCENTRATION_DIFFICULTIES": 0.0, "LASSITUDE": 0.0, "INABILITY_TO_FEEL": -0.5,
             "PESSIMISTIC_THOUGHTS": -0.5, "SUICIDAL_THOUGHTS": -2.0
         }
-    
-    def _apply_madrs_rules(self, scores):
-        """Apply MADRS specific clinical rules."""
-        if "REPORTED_SADNESS" in scores:
-            # Core Mood Gate
-            if scores["REPORTED_SADNESS"] <= 1:
-                if scores["SUICIDAL_THOUGHTS"] > 2:
-                    scores["SUICIDAL_THOUGHTS"] = 1
-                if scores["PESSIMISTIC_THOUGHTS"] > 2:
-                    scores["PESSIMISTIC_THOUGHTS"] = 2
-            
-            # Anhedonia Link
-            if scores["INABILITY_TO_FEEL"] >= 4 and scores["REPORTED_SADNESS"] < 2:
-                scores["REPORTED_SADNESS"] = 3
-            
-            # Tension and Sleep Link
-            if scores["INNER_TENSION"] >= 4 and scores["REDUCED_SLEEP"] == 0:
-                scores["REDUCED_SLEEP"] = 2
-        
+
+        # Per-item lookups as arrays in item_keys order, for batch sampling
+        self._factor_idx = np.array([self.item_to_factor[k] for k in self.item_keys])
+        self._offsets_arr = np.array([self.item_offsets[k] for k in self.item_keys])
+        self._sd_arr = np.array([self.item_residual_sd[k] for k in self.item_keys],
+                                dtype=np.float32)
+        self._factor_counts_arr = np.bincount(self._factor_idx, minlength=4)
+        self._factor_offset_sum = np.bincount(self._factor_idx, weights=self._offsets_arr,
+                                              minlength=4)
+
+        # Severity-scaled factor covariance for every valid target score (0-60):
+        # off-diagonals shrink by min(1, t/30), the unit diagonal is kept.
+        scale = np.minimum(1.0, np.arange(61) / 30.0)[:, None, None]
+        self._cov_table = np.where(np.eye(4, dtype=bool), self.base_factor_corr,
+                                   self.base_factor_corr * scale)
+        self._cov_table.flags.writeable = False
+
+        # Cholesky factors of the severity-scaled covariance, by target score
+        self._chol_cache: dict[int, np.ndarray] = {}
+
+    def _apply_madrs_rules(self, scores: np.ndarray) -> np.ndarray:
+        """Apply MADRS specific clinical rules to an (N, 10) batch in place."""
+        # Core Mood Gate
+        gate = scores[:, RS] <= 1
+        scores[gate & (scores[:, SUIC] > 2), SUIC] = 1
+        scores[gate & (scores[:, PESS] > 2), PESS] = 2
+
+        # Anhedonia Link
+        scores[(scores[:, FEEL] >= 4) & (scores[:, RS] < 2), RS] = 3
+
+        # Tension and Sleep Link
+        scores[(scores[:, IT] >= 4) & (scores[:, RSLP] == 0), RSLP] = 2
+
         return scores
 
     def _severity_scaled_cov(self, target_score: int) -> np.ndarray:
@@ -77,67 +114,155 @@ class HierarchicalMADRSGenerator:
         At low severity (floor/near-floor items), inter-factor correlations
         compress. This crude scaling captures that directionally:
         full correlations at score ~30+, attenuated below.
+        Looked up from the table precomputed in __init__ (read-only).
         """
-        scale = min(1.0, target_score / 30.0)
-        cov = self.base_factor_corr.copy()
-        # Scale only off-diagonals; keep variances at 1.0
-        for i in range(4):
-            for j in range(4):
-                if i != j:
-                    cov[i, j] *= scale
-        return cov
-
-    def generate_profile(self, target_score: int) -> dict | None:
-        if not (0 <= target_score <= 60):
-            return None
+        return self._cov_table[target_score]
 
-        base_per_item = target_score / 10.0
+    def _chol_for(self, target_score: int) -> np.ndarray:
+        """Lower Cholesky factor of the covariance for target_score (cached)."""
+        L = self._chol_cache.get(target_score)
+        if L is None:
+            cov = self._severity_scaled_cov(target_score)
+            off_diag = cov[~np.eye(4, dtype=bool)]
+            rho = off_diag[0]
+            if (np.all(np.diag(cov) == 1.0) and np.all(off_diag == rho)
+                    and -1.0 / 3.0 < rho < 1.0):
+                # Positive-definite equicorrelation (the default
+                # base_factor_corr): closed form, no LAPACK call
+                L = _equicorr_chol(rho)
+            else:
+                L = np.linalg.cholesky(cov)
+            self._chol_cache[target_score] = L
+        return L
 
-        # 1. Compute factor means that respect item offsets
-        factor_means = []
-        for f_idx in range(4):
-            items_in_f = [k for k, v in self.item_to_factor.items() if v == f_idx]
-            f_offset_sum = sum(self.item_offsets[item] for item in items_in_f)
-            f_mean = ((base_per_item * len(items_in_f)) - f_offset_sum) / len(items_in_f)
-            factor_means.append(f_mean)
+    def _allocate(self, continuous: np.ndarray, target_scores: np.ndarray) -> np.ndarray:
+        """Round (N, 10) continuous scores to integers summing to each target.
 
-        # 2. Draw correlated latent factors with severity-scaled covariance
-        factor_cov = self._severity_scaled_cov(target_score)
-        factor_scores = np.random.multivariate_normal(factor_means, factor_cov)
+        Largest-remainder (Hamilton) rounding: floor the clipped scores, then
+        give the missing points to the items with the largest remainders
+        (or, when over target, take them from the smallest). Each item moves
+        at most one point, so rows left short (large deltas, or items sampled
+        outside the range) are finished off by _adjust_to_target.
+        """
+        discrete = np.floor(np.clip(continuous, 0, 6)).astype(np.int8)
+        frac = continuous - discrete
+        needed = target_scores - discrete.sum(axis=1)
 
-        # 3. Generate individual items with item-specific residual noise
-        continuous = {}
-        discrete = {}
-        for item in self.item_keys:
-            f_idx = self.item_to_factor[item]
-            item_mean = factor_scores[f_idx] + self.item_offsets[item]
-            sampled = np.random.normal(loc=item_mean, scale=self.item_residual_sd[item])
-            continuous[item] = sampled
-            discrete[item] = max(0, min(6, int(round(sampled))))
-        # 4. Adjustment loop to hit target score (no clinical rules here)
-        current_sum = sum(discrete.values())
+        # Only items sampled inside [0, 6] take part: a remainder outside
+        # [0, 1) means the greedy loop could prefer a second step on another
+        # item, so those are left to _adjust_to_target.
+        in_range = (frac >= 0) & (frac < 1)
+        up = (needed > 0)[:, None] & (discrete < 6) & in_range
+        down = (needed < 0)[:, None] & (discrete > 0) & in_range
+        # Rank eligible items by how strongly they want to move (rank 0 = first)
+        key = np.where(up, -frac, np.where(down, frac, np.inf))
+        rank = np.empty_like(discrete)
+        np.put_along_axis(rank, np.argsort(key, axis=1, kind="stable"),
+                          np.arange(10), axis=1)
+        take = rank < np.abs(needed)[:, None]
+        discrete += (take & up).astype(np.int8) - (take & down)
+        return discrete
+
+    def _adjust_to_target(self, continuous: np.ndarray, discrete: np.ndarray,
+                          target_score: int):
+        """Greedily nudge discrete scores (in place) until they sum to target_score.
+
+        Under target, increment the item rounded down the most; over target,
+        decrement the item rounded up the most. Runs for up to 100 steps.
+        Both arguments are length-10 arrays in item_keys order.
+        """
+        diff = continuous - discrete
+        current_sum = int(discrete.sum())  # kept up to date, each step is +/-1
         for _ in range(100):
             if current_sum == target_score:
                 break
             if current_sum < target_score:
-                cands = [k for k in self.item_keys if discrete[k] < 6]
-                if not cands:
+                room = discrete < 6
+                if not room.any():
                     break
-                best = max(cands, key=lambda k: continuous[k] - discrete[k])
+                best = np.argmax(np.where(room, diff, -np.inf))
                 discrete[best] += 1
+                diff[best] -= 1
+                current_sum += 1
             else:
-                cands = [k for k in self.item_keys if discrete[k] > 0]
-                if not cands:
+                room = discrete > 0
+                if not room.any():
                     break
-                best = max(cands, key=lambda k: discrete[k] - continuous[k])
+                best = np.argmax(np.where(room, -diff, -np.inf))
                 discrete[best] -= 1
-            current_sum = sum(discrete.values())
+                diff[best] += 1
+                current_sum -= 1
 
-        # 5. Apply clinical rules as final pass — guarantees plausibility
-        #    Total may drift by 1-2 points but clinical validity is preserved.
-        discrete = self._apply_madrs_rules(discrete)
+    def generate_profile(self, target_score: int) -> np.ndarray | None:
+        """Generate one profile as a length-10 int8 array in item_keys order.
 
-        return discrete
+        Returns None if target_score is outside the MADRS range [0, 60].
+        Same steps and random stream as generate_many with one target, minus
+        the per-batch grouping, so streaming callers pay less per profile.
+        """
+        if not (0 <= target_score <= 60):
+            return None
+
+        base_per_item = target_score / 10.0
+
+        # 1. Compute factor means that respect item offsets
+        factor_means = ((base_per_item * self._factor_counts_arr - self._factor_offset_sum)
+                        / self._factor_counts_arr)
+
+        # 2. Draw correlated latent factors with severity-scaled covariance
+        L = self._chol_for(target_score)
+        factor_scores = factor_means + L @ self.rng.standard_normal(4)
+
+        # 3. Generate individual items with item-specific residual noise
+        continuous = ((factor_scores[self._factor_idx] + self._offsets_arr).astype(np.float32)
+                      + self.rng.standard_normal(10, dtype=np.float32) * self._sd_arr)
+        discrete = self._allocate(continuous[None], np.array([target_score]))
+
+        # 4. Adjustment loop for any residual left by the allocation
+        if discrete.sum() != target_score:
+            self._adjust_to_target(continuous, discrete[0], target_score)
+
+        # 5. Clinical rules as final pass
+        return self._apply_madrs_rules(discrete)[0]
+
+    def generate_many(self, target_scores) -> np.ndarray:
+        """Generate one profile per entry of target_scores in a single batch.
+
+        Factor scores and item residuals for all profiles are drawn as arrays,
+        and each distinct target score's covariance is factorized only once.
+        Returns an (N, 10) int8 array with columns in item_keys order.
+        """
+        target_scores = np.asarray(target_scores, dtype=np.int64)
+        if np.any((target_scores < 0) | (target_scores > 60)):
+            raise ValueError("target scores must be in [0, 60]")
+        n = len(target_scores)
+
+        # 1. Factor means per profile, respecting item offsets
+        base_per_item = target_scores[:, None] / 10.0
+        factor_means = ((base_per_item * self._factor_counts_arr - self._factor_offset_sum)
+                        / self._factor_counts_arr)
+
+        # 2. Correlated latent factors: one Cholesky per distinct target score
+        z = self.rng.standard_normal((n, 4))
+        factor_scores = np.empty((n, 4))
+        for score in np.unique(target_scores):
+            rows = target_scores == score
+            L = self._chol_for(int(score))
+            factor_scores[rows] = factor_means[rows] + z[rows] @ L.T
+
+        # 3. All item values at once: factor score + offset + residual noise
+        #    (float32 is plenty for ranking remainders; scores are stored as int8)
+        continuous = ((factor_scores[:, self._factor_idx] + self._offsets_arr).astype(np.float32)
+                      + self.rng.standard_normal((n, 10), dtype=np.float32) * self._sd_arr)
+        discrete = self._allocate(continuous, target_scores)
+
+        # 4. Adjustment loop only for rows the allocation could not finish
+        for i in np.flatnonzero(discrete.sum(axis=1) != target_scores):
+            self._adjust_to_target(continuous[i], discrete[i], int(target_scores[i]))
+
+        # 5. Clinical rules as final pass — guarantees plausibility.
+        #    Total may drift by 1-2 points but clinical validity is preserved.
+        return self._apply_madrs_rules(discrete)
 
     def validate(self, target_score: int = 30, n_samples: int = 5000):
         """Generate n_samples profiles and report summary statistics.
@@ -145,15 +270,14 @@ class HierarchicalMADRSGenerator:
         Use this to sanity-check that output means, SDs, and correlations
         are plausible for the given severity level.
         """
-        data = np.zeros((n_samples, 10))
-        adj_counts = []
-        for i in range(n_samples):
-            profile = self.generate_profile(target_score)
-            data[i] = [profile[k] for k in self.item_keys]
+        data = self.generate_many(np.full(n_samples, target_score, dtype=np.int16))
 
-        means = data.mean(axis=0)
-        sds = data.std(axis=0)
-        corr = np.corrcoef(data.T)
+        values = data.astype(np.float32)
+        means = values.mean(axis=0)
+        sds = values.std(axis=0)
+        # Pearson correlation as one cross-product of standardized columns
+        standardized = (values - means) / sds
+        corr = (standardized.T @ standardized) / n_samples
 
         print(f"=== Validation: target_score={target_score}, n={n_samples} ===")
         print(f"{'Item':<30} {'Mean':>6} {'SD':>6}")
@@ -177,8 +301,8 @@ if __name__ == "__main__":
     print("Example profiles at different severities:\n")
     for score in [12, 25, 38, 50]:
         p = gen.generate_profile(score)
-        items = " ".join(f"{v}" for v in p.values())
-        print(f"  target={score:2d}  items=[{items}]  sum={sum(p.values())}")
+        items = " ".join(f"{v}" for v in p)
+        print(f"  target={score:2d}  items=[{items}]  sum={p.sum()}")
 
     print()
     gen.validate(target_score=30, n_samples=5000)
\ No newline at end of file
@@ -6,16 +6,16 @@ Borentain correlation-matrix, and Hopkins CFA approaches.
 Usage:
     python3 generate_profiles_hopkins_latent_run.py
     python3 generate_profiles_hopkins_latent_run.py --n 500 --seed 42
+    python3 generate_profiles_hopkins_latent_run.py --n 100000 --workers 8
 """
 
 import argparse
-import csv
-import json
 import os
-import random
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
+import pandas as pd
 
 # Setup path so we can import from the vp folder
 VP_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vp")
@@ -25,71 +25,86 @@ import config
 from generate_profiles_hopkins_latent import HierarchicalMADRSGenerator
 
 
-def generate_profiles(n_profiles: int, seed: int = 42):
-    """Generate n profiles using the Hopkins hierarchical latent factor method."""
-    random.seed(seed)
-    np.random.seed(seed)
+# Profiles per independently seeded block. Fixed (not derived from the
+# worker count) so the output for a given seed is the same however many
+# workers are used.
+BLOCK_SIZE = 1024
 
-    generator = HierarchicalMADRSGenerator()
-    personas = config.PERSONAS
-    styles = list(config.COMMUNICATION_STYLE_DESCRIPTIONS.keys())
-
-    profiles = []
-    failed = 0
-
-    for i in range(n_profiles):
-        persona = random.choice(personas)
-        style = random.choice(styles)
-        target_score = int(round(random.gauss(25, 11)))
-        target_score = max(5, min(55, target_score))
-
-        scores_dict = generator.generate_profile(target_score)
-
-        if scores_dict is None:
-            failed += 1
-            continue
 
-        actual_total = int(sum(scores_dict.values()))
+def _generate_block(args):
+    """Worker: sample item scores for one block of target scores."""
+    targets, seed_seq = args
+    rng = np.random.default_rng(seed_seq)
+    return HierarchicalMADRSGenerator(rng=rng).generate_many(targets)
 
-        row = {
-            "profile_id": i,
-            "scale": "madrs",
-            "persona_name": persona["Name"],
-            "persona_age": int(persona["Age"]),
-            "persona_occupation": persona["Occupation"],
-            "persona_life_situation": persona["Life Situation"],
-            "communication_style": style,
-            "target_score": target_score,
-            "actual_total_score": actual_total,
-        }
-        for item_key, score_val in scores_dict.items():
-            row[item_key] = int(score_val)
 
-        profiles.append(row)
+def generate_profiles(n_profiles: int, seed: int = 42, workers: int = 1) -> pd.DataFrame:
+    """Generate n profiles using the Hopkins hierarchical latent factor method.
 
-    print(f"Generated {len(profiles)}/{n_profiles} profiles "
-          f"(hopkins latent method, {failed} failed)")
-    return profiles
+    Target scores are split into blocks of BLOCK_SIZE, each sampled with
+    generate_many under its own SeedSequence child; with workers > 1 the
+    blocks run in a process pool. Item scores are joined to the persona
+    columns as a DataFrame.
+    """
 
+    generator = HierarchicalMADRSGenerator()
+    personas = config.PERSONAS
+    styles = list(config.COMMUNICATION_STYLE_DESCRIPTIONS.keys())
 
-def save_profiles(profiles, output_dir):
-    """Save profiles as both CSV and JSON."""
+    # Persona fields as arrays, indexed by the drawn persona_idx below
+    names = np.array([p["Name"] for p in personas])
+    ages = np.array([int(p["Age"]) for p in personas], dtype=np.int16)
+    occupations = np.array([p["Occupation"] for p in personas])
+    situations = np.array([p["Life Situation"] for p in personas])
+
+    # Pre-draw persona, style and target score for every profile at once,
+    # then sample every item profile in one batch.
+    rng = np.random.default_rng(seed)
+    persona_idx = rng.integers(0, len(personas), n_profiles)
+    style_idx = rng.integers(0, len(styles), n_profiles)
+    targets = np.clip(np.round(rng.normal(25, 11, n_profiles)), 5, 55).astype(int)
+
+    blocks = [targets[i:i + BLOCK_SIZE] for i in range(0, n_profiles, BLOCK_SIZE)]
+    tasks = list(zip(blocks, np.random.SeedSequence(seed).spawn(len(blocks))))
+    if workers > 1 and len(tasks) > 1:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_generate_block, tasks, chunksize=chunksize))
+    else:
+        results = [_generate_block(task) for task in tasks]
+    scores = (np.concatenate(results) if results
+              else np.empty((0, len(generator.item_keys)), dtype=np.int8))
+
+    df = pd.DataFrame({
+        "profile_id": np.arange(n_profiles),
+        "scale": "madrs",
+        "persona_name": names[persona_idx],
+        "persona_age": ages[persona_idx],
+        "persona_occupation": occupations[persona_idx],
+        "persona_life_situation": situations[persona_idx],
+        "communication_style": np.array(styles)[style_idx],
+        "target_score": targets,
+        "actual_total_score": scores.sum(axis=1),
+    })
+    df = pd.concat([df, pd.DataFrame(scores, columns=generator.item_keys)], axis=1)
+
+    print(f"Generated {len(df)}/{n_profiles} profiles (hopkins latent method)")
+    return df
+
+
+def save_profiles(df, output_dir, pretty_json=False):
+    """Save profiles as both CSV and JSON (compact unless pretty_json)."""
     os.makedirs(output_dir, exist_ok=True)
 
     # --- CSV ---
     csv_path = os.path.join(output_dir, "profiles_madrs.csv")
-    if profiles:
-        fieldnames = list(profiles[0].keys())
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(profiles)
+    if not df.empty:
+        df.to_csv(csv_path, index=False)
         print(f"Saved CSV: {csv_path}")
 
     # --- JSON ---
     json_path = os.path.join(output_dir, "profiles_madrs.json")
-    with open(json_path, "w") as f:
-        json.dump(profiles, f, indent=2)
+    df.to_json(json_path, orient="records", indent=2 if pretty_json else None)
     print(f"Saved JSON: {json_path}")
 
 
@@ -109,15 +124,24 @@ def main():
         "--output_dir", type=str, default=None,
         help="Output directory (default: ./generated_profiles_hopkins_latent/)"
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Worker processes for item sampling (default: 1; "
+             f"blocks of {BLOCK_SIZE} profiles are spread across workers)"
+    )
+    parser.add_argument(
+        "--pretty-json", action="store_true",
+        help="Indent the JSON output (default: compact, faster for large --n)"
+    )
     args = parser.parse_args()
 
     output_dir = args.output_dir or os.path.join(
         os.path.dirname(os.path.abspath(__file__)), "generated_profiles_hopkins_latent"
     )
 
-    profiles = generate_profiles(args.n, seed=args.seed)
-    save_profiles(profiles, output_dir)
-    print(f"\nDone. Total profiles: {len(profiles)}")
+    df = generate_profiles(args.n, seed=args.seed, workers=args.workers)
+    save_profiles(df, output_dir, pretty_json=args.pretty_json)
+    print(f"\nDone. Total profiles: {len(df)}")
 
 
 if __name__ == "__main__":
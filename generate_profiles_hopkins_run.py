@@ -9,13 +9,11 @@ Usage:
 """
 
 import argparse
-import csv
-import json
 import os
-import random
 import sys
 
 import numpy as np
+import pandas as pd
 
 # Setup path so we can import from the vp folder
 VP_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vp")
@@ -25,65 +23,59 @@ import config
 from generate_profiles_hopkins import FactorBasedMADRSGenerator
 
 
-def generate_profiles(n_profiles: int, seed: int = 42):
+def generate_profiles(n_profiles: int, seed: int = 42) -> pd.DataFrame:
     """Generate n profiles using the Hopkins factor-based method."""
-    random.seed(seed)
     np.random.seed(seed)
 
     generator = FactorBasedMADRSGenerator()
     personas = config.PERSONAS
     styles = list(config.COMMUNICATION_STYLE_DESCRIPTIONS.keys())
 
-    profiles = []
-
-    for i in range(n_profiles):
-        persona = random.choice(personas)
-        style = random.choice(styles)
-        target_score = int(round(random.gauss(25, 11)))
-        target_score = max(5, min(55, target_score))
-
-        scores_dict = generator.generate(target_score)
-
-        actual_total = int(sum(scores_dict.values()))
-
-        row = {
-            "profile_id": i,
-            "scale": "madrs",
-            "persona_name": persona["Name"],
-            "persona_age": int(persona["Age"]),
-            "persona_occupation": persona["Occupation"],
-            "persona_life_situation": persona["Life Situation"],
-            "communication_style": style,
-            "target_score": target_score,
-            "actual_total_score": actual_total,
-        }
-        for item_key, score_val in scores_dict.items():
-            row[item_key] = int(score_val)
-
-        profiles.append(row)
-
-    print(f"Generated {len(profiles)}/{n_profiles} profiles (hopkins factor method)")
-    return profiles
-
-
-def save_profiles(profiles, output_dir):
-    """Save profiles as both CSV and JSON."""
+    # Persona fields as arrays, indexed by the drawn persona_idx below
+    names = np.array([p["Name"] for p in personas])
+    ages = np.array([int(p["Age"]) for p in personas], dtype=np.int16)
+    occupations = np.array([p["Occupation"] for p in personas])
+    situations = np.array([p["Life Situation"] for p in personas])
+
+    # Pre-draw persona, style and target score for every profile at once,
+    # then sample every item profile in one batch.
+    rng = np.random.default_rng(seed)
+    persona_idx = rng.integers(0, len(personas), n_profiles)
+    style_idx = rng.integers(0, len(styles), n_profiles)
+    targets = np.clip(np.round(rng.normal(25, 11, n_profiles)), 5, 55).astype(int)
+
+    scores = generator.generate_batch(targets)
+
+    df = pd.DataFrame({
+        "profile_id": np.arange(n_profiles),
+        "scale": "madrs",
+        "persona_name": names[persona_idx],
+        "persona_age": ages[persona_idx],
+        "persona_occupation": occupations[persona_idx],
+        "persona_life_situation": situations[persona_idx],
+        "communication_style": np.array(styles)[style_idx],
+        "target_score": targets,
+        "actual_total_score": scores.sum(axis=1),
+    })
+    df = pd.concat([df, pd.DataFrame(scores, columns=generator.items)], axis=1)
+
+    print(f"Generated {len(df)}/{n_profiles} profiles (hopkins factor method)")
+    return df
+
+
+def save_profiles(df, output_dir, pretty_json=False):
+    """Save profiles as both CSV and JSON (compact unless pretty_json)."""
     os.makedirs(output_dir, exist_ok=True)
 
     # --- CSV ---
     csv_path = os.path.join(output_dir, "profiles_madrs.csv")
-    if profiles:
-        fieldnames = list(profiles[0].keys())
-        with open(csv_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(profiles)
+    if not df.empty:
+        df.to_csv(csv_path, index=False)
         print(f"Saved CSV: {csv_path}")
 
     # --- JSON ---
     json_path = os.path.join(output_dir, "profiles_madrs.json")
-    with open(json_path, "w") as f:
-        json.dump(profiles, f, indent=2)
+    df.to_json(json_path, orient="records", indent=2 if pretty_json else None)
     print(f"Saved JSON: {json_path}")
 
 
@@ -103,15 +95,19 @@ def main():
         "--output_dir", type=str, default=None,
         help="Output directory (default: ./generated_profiles_hopkins/)"
     )
+    parser.add_argument(
+        "--pretty-json", action="store_true",
+        help="Indent the JSON output (default: compact, faster for large --n)"
+    )
     args = parser.parse_args()
 
     output_dir = args.output_dir or os.path.join(
         os.path.dirname(os.path.abspath(__file__)), "generated_profiles_hopkins"
     )
 
-    profiles = generate_profiles(args.n, seed=args.seed)
-    save_profiles(profiles, output_dir)
-    print(f"\nDone. Total profiles: {len(profiles)}")
+    df = generate_profiles(args.n, seed=args.seed)
+    save_profiles(df, output_dir, pretty_json=args.pretty_json)
+    print(f"\nDone. Total profiles: {len(df)}")
 
 
 if __name__ == "__main__":